@@ -1,13 +1,22 @@
-from simplejson import dumps
 import datetime
 import traceback
 import functools
-from odoo import http
+import threading
+import contextlib
+import concurrent.futures
+import odoo
+from odoo import http, api
 from odoo.http import request, Response
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
+from odoo.exceptions import AccessDenied
 from .middleware.MiddlewareData import MiddlewareData
 from .middleware.MiddlewareException import MiddlewareException
+from .TokenValidator import token_validators
+from .Profiler import profiler
+from .QueryBudget import query_budget
+from .LoginThrottle import login_throttle
 from . import util
+from .util import dumps
 
 import logging
 _logger = logging.getLogger(__name__)
@@ -17,20 +26,62 @@ class InvalidTokenException(Exception):
     pass
 
 
+class _StreamMeta(dict):
+    '''
+    Pagination metadata yielded at the end of a stream
+    '''
+    pass
+
+
+def _per_request(name, default=None):
+    '''
+    Attribute of `JwtRequest` kept per thread: odoo's threaded server runs overlapping requests
+    on the shared `jwt_request`, each in its own thread.
+    '''
+    def get(self):
+        return getattr(self._local, name, default() if callable(default) else default)
+
+    def set(self, value):
+        setattr(self._local, name, value)
+
+    return property(get, set)
+
+
 class JwtRequest:
     body = {}
     method = 'get'
     headers = {}
     token = ''
+    path = ''
+    _local = threading.local()
+    # middlewares already run for the whole batch: skipped by its calls, never by another request
+    done = _per_request('done', set)
+    # handlers run at the end of the request (or of a batch call)
+    end_events = _per_request('end_events', list)
+    # None unless the request is profiled
+    profile = _per_request('profile')
+    # None unless profiling or a query budget is set
+    stats = _per_request('stats')
     data: MiddlewareData
     # list of main middlewares
     middleware_list = {}
     # list of innate middlewares
     innate = []
+    # aliases of independent, side-effect free middlewares, see `register_middleware`
+    concurrent_list = set()
+    # shared by all requests, created on first concurrent run
+    pool = None
+    pool_lock = threading.Lock()
 
     def __init__(self):
         self.odoo_req = request
         self.data = MiddlewareData()
+        # authenticate bearer requests without touching the session store
+        self.stateless = util.setting('stateless', False, bool)
+        # calls allowed in one `batch`
+        self.batch_max_calls = util.setting('batch_max_calls', 50, int)
+        # seconds concurrent middlewares are waited for
+        self.middleware_timeout = util.setting('middleware_timeout', 30, float)
 
 
     def parse_request(self):
@@ -61,12 +112,13 @@ class JwtRequest:
             except Exception:
                 pass
         self.method = method
+        self.path = request.httprequest.path
         self.headers = headers
         self.body = body
         self.token = token
 
 
-    def register_middleware(self, alias: str, handler):
+    def register_middleware(self, alias: str, handler, concurrent=False):
         '''
         Register middleware handler.
 
@@ -76,16 +128,47 @@ class JwtRequest:
             alias of handler, e.g., `jwt`
         `handler` : callable(request Request)
             a handler to be execute. Must have **kw
+        `concurrent` : bool
+            the handler is independent from other middlewares and side-effect free,
+            it may run in a thread pool alongside adjacent concurrent middlewares.
+            It must not use odoo's request, env or cursor, only `req.headers`, `req.body`, `req.token` and `data`.
         '''
         self.middleware_list[alias] = handler
+        if concurrent:
+            self.concurrent_list.add(alias)
+        else:
+            self.concurrent_list.discard(alias)
 
     def middleware_always(self, handler):
         self.innate.append(handler)
 
     def _run_handler(self, handler, param=None, alias=''):
+        if self.stats:
+            with self.stats.section(self._handler_name(handler, alias)):
+                return self._call_handler(handler, param, alias)
+        return self._call_handler(handler, param, alias)
+
+
+    def _handler_name(self, handler, alias=''):
+        if type(alias) is tuple:
+            alias = alias[0]
+        return str(alias or getattr(handler, '__name__', handler))
+
+
+    def _call_controller(self, handler, *k, **kw):
+        if self.stats:
+            with self.stats.section('controller'):
+                return handler(*k, **kw)
+        return handler(*k, **kw)
+
+
+    def _call_handler(self, handler, param=None, alias=''):
         try:
             if callable(handler):
-                handler(req=self, data=self.data, param=param)
+                # a middleware may respond directly
+                result = handler(req=self, data=self.data, param=param)
+                if result:
+                    return result
         except MiddlewareException as e:
             _logger.warning(f'Middleware [{str(alias or handler)}]: {str(e)}')
             message, code = e.build_response()
@@ -93,7 +176,7 @@ class JwtRequest:
         except Exception as e:
             _logger.warning(f'Middleware-generic [{str(alias or handler)}]: {str(e)}')
             # custom exception
-            if getattr(e, 'response'):
+            if getattr(e, 'response', None):
                 return e.response()
             # bad request
             return self.response({}, 400)
@@ -112,18 +195,87 @@ class JwtRequest:
         return None, None
 
 
+    def _middleware_key(self, alias):
+        if type(alias) is tuple:
+            return (alias[0], repr(alias[1:]))
+        return alias
+
+
     def _requires_innate(self):
-        for m in self.innate:
-            handler, param = self._parse_handler(m)
-            if handler:
-                error = self._run_handler(handler, param)
-                if error: return error
+        return self._run_list(self.innate, named=False)
+
+
+    def _is_concurrent(self, alias, handler):
+        if type(alias) is tuple:
+            alias = alias[0]
+        if type(alias) is str:
+            return alias in self.concurrent_list
+        # middleware function passed to the decorator directly
+        return getattr(handler, 'concurrent', False)
+
+
+    def _run_list(self, alias_list, named=True):
+        '''
+        Run middlewares in order. Adjacent concurrent middlewares run together, any other middleware
+        waits for the previous ones, and the first error in declaration order is responded.
+        '''
+        pending = []
+        for alias in alias_list:
+            if self._middleware_key(alias) in self.done:
+                continue
+            handler, param = self._parse_handler(alias)
+            if not handler:
+                # fail closed: a misspelled or unregistered middleware must not skip its check
+                _logger.error(f'Middleware [{self._handler_name(None, alias)}]: not registered')
+                return self.response({'message': 'Server error'}, 500)
+            if self._is_concurrent(alias, handler):
+                pending.append((handler, param, alias if named else ''))
+                continue
+            error = self._run_concurrent(pending)
+            pending = []
+            if error: return error
+            error = self._run_handler(handler, param, alias if named else '')
+            if error: return error
+        return self._run_concurrent(pending)
+
+
+    def _run_concurrent(self, pending):
+        if not pending:
+            return None
+        if len(pending) == 1:
+            return self._run_handler(*pending[0])
+        if not self.pool:
+            with self.pool_lock:
+                # two threaded requests may get here first at once, only one pool must be created
+                if not JwtRequest.pool:
+                    JwtRequest.pool = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=util.setting('middleware_threads', 8, int),
+                        thread_name_prefix='jwt_provider.middleware',
+                    )
+        name = ','.join(self._handler_name(handler, alias) for handler, param, alias in pending)
+        with (self.stats.section(name) if self.stats else contextlib.nullcontext()):
+            futures = [self.pool.submit(handler, req=self, data=self.data, param=param) for handler, param, _ in pending]
+            # let every middleware finish, so none is left running after the response, unless one hangs
+            _, hung = concurrent.futures.wait(futures, timeout=self.middleware_timeout)
+        for future, (handler, param, alias) in zip(futures, pending):
+            if future in hung:
+                # its pool thread is lost until it returns, the request is not
+                future.cancel()
+                _logger.error(f'Middleware [{self._handler_name(handler, alias)}]: timed out')
+                return self.response({'message': 'Middleware timeout'}, 504)
+            # results and exceptions are handled here, in the request's thread
+            error = self._call_handler(lambda future=future, **kw: future.result(), param, alias or handler)
+            if error: return error
 
 
     def exec_middleware(self, alias):
+        if self._middleware_key(alias) in self.done:
+            return
         handler, param = self._parse_handler(alias)
-        if handler:
-            handler(req=self, data=self.data, param=param)
+        if not handler:
+            _logger.error(f'Middleware [{self._handler_name(None, alias)}]: not registered')
+            raise MiddlewareException('Server error', 500, 'unknown_middleware')
+        handler(req=self, data=self.data, param=param)
 
 
     def _requires_middlewares(self, *alias_list):
@@ -132,11 +284,7 @@ class JwtRequest:
 
         @return Response if any validation errors. Else none.
         '''
-        for alias in alias_list:
-            handler, param = self._parse_handler(alias)
-            if handler:
-                error = self._run_handler(handler, param, alias)
-                if error: return error
+        return self._run_list(alias_list)
 
 
     def _requires(self, *alias_list):
@@ -156,12 +304,28 @@ class JwtRequest:
         init events
         '''
         self.end_events = []
+        self.done = set()
         self.parse_request()
+        # None unless this request is sampled or asked for profiling
+        self.profile = profiler.start(request.httprequest.path, self.headers)
+        # per section accounting, None unless profiling or a query budget is set
+        self.stats = self.profile or query_budget.start(request.httprequest.path)
 
     def end(self, response=None):
         '''
         trigger events
         '''
+        self._trigger_end_events(response)
+        if self.stateless and request:
+            # odoo may still touch the session during dispatch (e.g. `session.db`), never save it
+            request.session.modified = False
+        if self.stats:
+            query_budget.check(self.stats)
+        if self.profile:
+            profiler.stop(self.profile)
+        self.profile = self.stats = None
+
+    def _trigger_end_events(self, response=None):
         for handler in self.end_events:
             if callable(handler):
                 handler(req=self, res=response)
@@ -185,12 +349,14 @@ class JwtRequest:
                     return error
                 # controller response
                 try:
-                    response = handler(*k, **kw)
+                    response = self._call_controller(handler, *k, **kw)
                     self.end(response)
                     return response
                 except Exception as e:
                     self.end(e)
                     raise e
+            # allows dispatching from a batch, see `batch`
+            execute_all._jwt_route = {'handler': handler, 'middlewares': alias_list, 'innate': True}
             return execute_all
         return exec_http
 
@@ -210,16 +376,91 @@ class JwtRequest:
                     return error
                 # controller response
                 try:
-                    response = handler(*k, **kw)
+                    response = self._call_controller(handler, *k, **kw)
                     self.end(response)
                     return response
                 except Exception as e:
                     self.end(e)
                     raise e
+            # allows dispatching from a batch, see `batch`
+            execute_all._jwt_route = {'handler': handler, 'middlewares': alias_list, 'innate': False}
             return execute_all
         return exec_http
 
 
+    def batch(self, calls, *alias_list):
+        '''
+        Dispatch many json rpc calls in one request, for controller type='json'.
+
+        Innate and `alias_list` middlewares (e.g., `jwt`) run once for the whole batch,
+        then each call `{ id, route, params }` runs the remaining middlewares of its route and its controller method,
+        sharing `MiddlewareData`. Only routes decorated with `middlewares()`/`pure_middlewares()` can be called.
+
+        Calls run sequentially: controllers rely on the request's thread-local environment and cursor.
+        Each call runs in its own savepoint, a failing call does not leave partial writes behind.
+
+        Return an `rpc_response` of `[{ id, result }]`, each result being the call's own `rpc_response`.
+        '''
+        if not isinstance(calls, list):
+            return self.rpc_response({'message': 'Invalid calls'}, 400)
+        if len(calls) > self.batch_max_calls:
+            return self.rpc_response({'message': 'Too many calls, at most %d' % self.batch_max_calls}, 413)
+        self.start()
+        error = self._requires(*alias_list)
+        if error:
+            self.end(error)
+            return error
+        self.done = {self._middleware_key(m) for m in list(self.innate) + list(alias_list)}
+        results = []
+        try:
+            for call in calls:
+                results.append({
+                    'id': call.get('id') if isinstance(call, dict) else None,
+                    'result': self._dispatch_call(call),
+                })
+        finally:
+            self.done = set()
+        response = self.rpc_response(results)
+        self.end(response)
+        return response
+
+
+    def _dispatch_call(self, call):
+        if not isinstance(call, dict) or not isinstance(call.get('params', {}), dict):
+            return self.rpc_response({'message': 'Invalid call'}, 400)
+        try:
+            endpoint, args = request.env['ir.http'].routing_map() \
+                .bind_to_environ(request.httprequest.environ) \
+                .match(path_info=call.get('route'), method='POST')
+        except Exception:
+            return self.rpc_response({'message': 'Unknown route'}, 404)
+        route = getattr(endpoint.method, '_jwt_route', None)
+        if not route or endpoint.routing.get('type') != 'json':
+            return self.rpc_response({'message': 'Route cannot be batched'}, 400)
+
+        params = call.get('params') or {}
+        self.path = call.get('route')
+        self.body = params
+        # each call gets its own end events, e.g., `cache` stores each result
+        batch_events, self.end_events = self.end_events, []
+        try:
+            with request.env.cr.savepoint():
+                if route['innate']:
+                    error = self._requires(*route['middlewares'])
+                else:
+                    error = self._requires_middlewares(*route['middlewares'])
+                if error:
+                    result = error
+                else:
+                    result = self._call_controller(route['handler'], endpoint.method.__self__, **args, **params)
+        except Exception as e:
+            _logger.error(f'Batch call [{call.get("route")}]: {str(e)}')
+            result = self.rpc_response({'message': 'Server error'}, 500)
+        self._trigger_end_events(result)
+        self.end_events = batch_events
+        return result
+
+
     def is_rpc(self):
         return 'application/json' in request.httprequest._parsed_content_type
 
@@ -231,10 +472,39 @@ class JwtRequest:
     def http_response(self, data={}, status=200):
         '''
         Response normal http request (with controller type='http')
+
+        Successful GET responses carry a weak `ETag`, a matching `If-None-Match` yields a 304.
+        Body is compressed when `ODOO_JWT_COMPRESS` is on and it is larger than `ODOO_JWT_COMPRESS_MIN_SIZE`.
         '''
-        return Response(dumps(data), status=status, headers=[
+        body = dumps(data)
+        headers = [
             ('Content-Type', 'application/json'),
-        ])
+        ]
+        httprequest = request.httprequest
+        if self.is_ok_response(status) and httprequest.method in ('GET', 'HEAD') and util.setting('etag', True, bool):
+            tag = util.etag(body)
+            headers.append(('ETag', tag))
+            if self._etag_matches(httprequest.headers.get('If-None-Match'), tag):
+                return Response(status=304, headers=[('ETag', tag)])
+        if util.setting('compress', False, bool) and len(body) >= util.setting('compress_min_size', 1024, int):
+            body, encoding = util.compress(body, httprequest.accept_encodings)
+            headers.append(('Vary', 'Accept-Encoding'))
+            if encoding:
+                headers.append(('Content-Encoding', encoding))
+        return Response(body, status=status, headers=headers)
+
+
+    def _etag_matches(self, if_none_match, tag):
+        '''
+        Weak comparison of an etag against an `If-None-Match` header
+        '''
+        if not if_none_match:
+            return False
+        for t in if_none_match.split(','):
+            t = t.strip()
+            if t == '*' or t == tag or 'W/' + t == tag:
+                return True
+        return False
 
 
     def rpc_response(self, data={}, status=200):
@@ -250,6 +520,112 @@ class JwtRequest:
         return { **r, 'data': data }
 
 
+    def stream_response(self, records, batch_size=200, serializer=None, limit=None, ndjson=False):
+        '''
+        Stream a large result set as json, reading and serializing `batch_size` records at a time.
+
+        `records` : a recordset or any iterable (e.g., a generator) of json-serializable items.
+        A recordset is read in chunks with its own cursor (the request's one is already closed
+        when the body is sent), items are ordered by id and `limit` bounds the page size:
+        the id of the last item is returned as `next_cursor`, to be sent back by the client
+        and applied with `domain + [('id', '>', cursor)]`.
+
+        `serializer` : callable(batch) returning a list of dicts, defaults to `batch.read()`
+        (or `to_dict(single=False)` when the model provides it). Ignored for plain iterables.
+
+        Output is `{"data": [...], "count": n, "next_cursor": id}`, or with `ndjson=True`
+        one item per line followed by a last line `{"count": n, "next_cursor": id}`.
+
+        For json rpc request, the whole page is returned with `rpc_response` instead.
+        '''
+        if isinstance(records, odoo.models.BaseModel):
+            items = self._iter_records(records, batch_size, serializer, limit)
+        else:
+            items = self._iter_items(records, limit)
+
+        if self.is_rpc():
+            meta = {}
+            with api.Environment.manage():
+                data = [item for item in items if not self._is_meta(item, meta)]
+            return self.rpc_response({'data': data, **meta})
+
+        def generate():
+            meta = {}
+            first = True
+            if not ndjson:
+                yield b'{"data": ['
+            try:
+                for item in items:
+                    if self._is_meta(item, meta):
+                        continue
+                    # dates and other non-json values of `read()` are stringified
+                    chunk = dumps(item, default=str)
+                    if ndjson:
+                        yield (chunk + '\n').encode('utf-8')
+                    else:
+                        yield (chunk if first else ', ' + chunk).encode('utf-8')
+                    first = False
+            except Exception as e:
+                # headers are already sent: close the document and flag it as incomplete
+                _logger.error(f'Stream response: {str(e)}')
+                meta = {'error': 'Server error', 'count': None, 'next_cursor': None}
+            if ndjson:
+                yield (dumps(meta) + '\n').encode('utf-8')
+            else:
+                tail = ''.join(', %s: %s' % (dumps(k), dumps(v)) for k, v in meta.items())
+                yield ('], ' + tail[2:] + '}').encode('utf-8') if tail else b']}'
+
+        content_type = 'application/x-ndjson' if ndjson else 'application/json'
+        return Response(generate(), status=200, headers=[
+            ('Content-Type', content_type),
+        ], direct_passthrough=True)
+
+
+    def _is_meta(self, item, meta):
+        if isinstance(item, _StreamMeta):
+            meta.update(item)
+            return True
+        return False
+
+
+    def _iter_items(self, items, limit=None):
+        count = 0
+        for item in items:
+            if limit and count >= limit:
+                break
+            count += 1
+            yield item
+        yield _StreamMeta(count=count, next_cursor=None)
+
+
+    def _iter_records(self, records, batch_size, serializer=None, limit=None):
+        ids = sorted(records.ids)
+        if limit:
+            ids = ids[:limit]
+        model = records._name
+        dbname = records.env.cr.dbname
+        uid = records.env.uid
+        context = dict(records.env.context)
+        if not serializer:
+            if hasattr(records, 'to_dict'):
+                serializer = lambda batch: batch.to_dict(single=False)
+            else:
+                serializer = lambda batch: batch.read()
+        # cursor-based pagination: more items may exist only if this page is full
+        next_cursor = ids[-1] if ids and limit and len(ids) == limit else None
+
+        # consumed after the request's `Environment.manage()` block has exited
+        with api.Environment.manage(), odoo.registry(dbname).cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            for i in range(0, len(ids), batch_size):
+                batch = env[model].browse(ids[i:i + batch_size])
+                for item in serializer(batch):
+                    yield item
+                # keep memory flat
+                batch.invalidate_cache()
+        yield _StreamMeta(count=len(ids), next_cursor=next_cursor)
+
+
     def response(self, data={}, status=200):
         '''
         Create a response to either http or rpc request
@@ -275,6 +651,7 @@ class JwtRequest:
                 'iat': datetime.datetime.utcnow(),
                 'sub': user.id,
                 'lgn': user.login,
+                'db': user.env.cr.dbname,
             }
             token = util.sign_token(payload)
             self.save_token(token, user.id, exp)
@@ -310,11 +687,22 @@ class JwtRequest:
         If `with_token` is `True`, will create a jwt token and return it on success or `false` on failure
 
         You can access the logged in user through `request.env.user`
+
+        Raise `LoginThrottledException` (an `AccessDenied`) without checking the password
+        when the login or ip has failed too many times recently.
         '''
+        ip = self.remote_addr()
+        login_throttle.check(login, ip)
         state = self.get_state()
-        uid = request.session.authenticate(state['d'], login, password)
+        try:
+            uid = request.session.authenticate(state['d'], login, password)
+        except AccessDenied:
+            login_throttle.failure(login, ip)
+            raise
         if not uid:
+            login_throttle.failure(login, ip)
             return False
+        login_throttle.success(login, ip)
         if with_token:
             return self.create_token(request.env.user)
         return True
@@ -322,7 +710,8 @@ class JwtRequest:
 
     def logout(self, token=''):
         try:
-            request.session.logout()
+            if not self.stateless:
+                request.session.logout()
             if token:
                 request.env['jwt_provider.access_token'].sudo().search([
                     ('token', '=', token)
@@ -334,22 +723,56 @@ class JwtRequest:
     def cleanup(self):
         # Clean up things after success request
         # use logout here to make request as stateless as possible
+        # in stateless mode, session was never used: nothing to clean up
 
-        request.session.logout()
+        if not self.stateless:
+            request.session.logout()
 
 
-    def verify(self, token):
+    def verify(self, token, db=None, cr=None):
         '''
         Check if jwt token existed in db and is not expired
+
+        `db` defaults to the request's database, `cr` may be given to reuse an opened cursor of that database.
+
+        Return the user id on success, else `False`.
         '''
-        record = request.env['jwt_provider.access_token'].sudo().search([
-            ('token', '=', token)
-        ])
+        if not db:
+            db = request.env.cr.dbname
+        if cr is None and request and request.db == db:
+            # no need for another connection when the request is bound to that database
+            cr = request.env.cr
+        return token_validators.get(db).verify(token, cr=cr, ip=self.remote_addr())
 
-        if len(record) != 1 or record.is_expired:
-            return False
 
-        return record.user_id
+    def remote_addr(self):
+        try:
+            return request.httprequest.remote_addr
+        except Exception:
+            return None
+
+
+    def token_db(self, payload):
+        '''
+        Database a token was issued for, falls back to the session one for tokens without `db` claim.
+        '''
+        db = payload.get('db') or request.session.db
+        # the claim is signed, but still must be served by this host
+        if not db or not http.db_filter([db]):
+            raise InvalidTokenException()
+        return db
+
+
+    def authenticate_stateless(self, db, uid):
+        '''
+        Log user in for the current request only: set uid on the request environment,
+        the session is neither read nor modified, thus never written to the session store.
+
+        The request must be bound to the token's database.
+        '''
+        if request.db != db:
+            raise InvalidTokenException()
+        request.uid = uid
 
 
     def validate_token(self, token, auth=False):
@@ -358,23 +781,79 @@ class JwtRequest:
 
         Return True on success or raise exceptions on failure.
 
-        If auth=True, will also log user in with that token.
+        If auth=True, will also log user in with that token, on the database from the token's `db` claim.
+        A request already bound to another database is refused.
         '''
-        # first token must be in our db
-        if not self.verify(token):
-            raise InvalidTokenException()
-
-        # decode token, will raise exceptions
+        # decode token first, will raise exceptions. Cheap, no db access
         payload = util.decode_token(token)
+        db = self.token_db(payload)
+
+        # then token must be in its db
+        uid = self.verify(token, db=db)
+        if not uid:
+            raise InvalidTokenException()
 
         if auth:
-            # signature: https://github.com/odoo/odoo/blob/14.0/odoo/http.py#L987
-            uid = request.session.authenticate(
-                request.session.db, login=payload['lgn'], password=token)
-            if not uid:
-                raise InvalidTokenException()
+            if self.stateless:
+                self.authenticate_stateless(db, uid)
+            else:
+                # the request's cursor is opened on its own database: switching the session to another one
+                # would run that database's uid against it
+                if request.db and request.db != db:
+                    raise InvalidTokenException()
+                # signature: https://github.com/odoo/odoo/blob/14.0/odoo/http.py#L987
+                uid = request.session.authenticate(db, login=payload['lgn'], password=token)
+                if not uid:
+                    raise InvalidTokenException()
 
         return True
 
 
+    def introspect(self, tokens):
+        '''
+        RFC 7662-style introspection of many tokens at once.
+
+        Signatures are checked in process, then tokens are looked up with one query per database.
+
+        Return a list of `{ active, sub, exp, ... }`, in the same order as `tokens`.
+        `exp` is the stored expiry, which may have been shortened since the token was signed.
+        '''
+        payloads = {}
+        by_db = {}
+        for token in set(tokens):
+            try:
+                payload = util.decode_token(token)
+                db = payload.get('db') or request.session.db
+                if not db or not http.db_filter([db]):
+                    continue
+            except Exception:
+                continue
+            payloads[token] = payload
+            by_db.setdefault(db, []).append(token)
+
+        found = {}
+        for db, db_tokens in by_db.items():
+            found.update(token_validators.get(db).lookup_many(db_tokens))
+
+        now = datetime.datetime.utcnow()
+        result = []
+        for token in tokens:
+            record = found.get(token)
+            if not record or now > record[2]:
+                result.append({'active': False})
+                continue
+            payload = payloads[token]
+            info = {
+                'active': True,
+                'sub': record[1],
+                'exp': int(record[2].replace(tzinfo=datetime.timezone.utc).timestamp()),
+                'iat': payload.get('iat'),
+                'username': payload.get('lgn'),
+            }
+            if payload.get('scope'):
+                info['scope'] = payload['scope']
+            result.append(info)
+        return result
+
+
 jwt_request = JwtRequest()
@@ -0,0 +1,143 @@
+import threading
+import time
+from odoo.exceptions import AccessDenied
+from . import util
+
+import logging
+_logger = logging.getLogger(__name__)
+
+
+class LoginThrottledException(AccessDenied):
+    '''
+    Raised instead of checking a password when too many attempts failed recently.
+
+    Attributes
+    ----------
+    `retry_after`: int
+        seconds before the next attempt is allowed
+    '''
+
+    def __init__(self, retry_after=0):
+        self.retry_after = retry_after
+        super().__init__('Too many failed login attempts, retry in %d seconds' % retry_after)
+
+
+class _Counter:
+    '''
+    Sliding window counter: two fixed buckets, the previous one weighted by its overlap with the window.
+    '''
+    __slots__ = ('start', 'current', 'previous', 'blocked_until')
+
+    def __init__(self, start):
+        self.start = start
+        self.current = 0
+        self.previous = 0
+        self.blocked_until = 0.0
+
+    def roll(self, now, window):
+        elapsed = now - self.start
+        if elapsed >= window:
+            # previous bucket is kept only if it is the one right before
+            self.previous = self.current if elapsed < 2 * window else 0
+            self.current = 0
+            self.start = now - (elapsed % window)
+
+    def count(self, now, window):
+        self.roll(now, window)
+        weight = 1 - (now - self.start) / window
+        return self.current + self.previous * weight
+
+
+class LoginThrottle:
+    '''
+    In-process failed login tracker, keyed by (login, ip) pair and by ip.
+
+    Once a pair has `ODOO_JWT_LOGIN_MAX_FAILURES` failures in the last `ODOO_JWT_LOGIN_WINDOW` seconds,
+    or an ip `ODOO_JWT_LOGIN_IP_MAX_FAILURES` failures (any login), it is blocked with an exponential backoff
+    (from `ODOO_JWT_LOGIN_BACKOFF` seconds, up to `ODOO_JWT_LOGIN_MAX_BACKOFF`).
+    Blocked attempts are rejected before any password hashing.
+
+    A login alone is never blocked, else anyone could lock a user out by failing on purpose.
+    '''
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.enabled = util.setting('login_throttle', True, bool)
+        self.max_failures = util.setting('login_max_failures', 5, int)
+        # shared by every login tried from an ip (NAT, proxies), thus higher
+        self.ip_max_failures = util.setting('login_ip_max_failures', 50, int)
+        self.window = util.setting('login_window', 300, int)
+        self.backoff = util.setting('login_backoff', 1, int)
+        self.max_backoff = util.setting('login_max_backoff', 900, int)
+        self.max_keys = util.setting('login_max_keys', 100000, int)
+        self.counters = {}
+        self.lock = threading.Lock()
+
+
+    def _keys(self, login, ip):
+        '''
+        Return [(key, max failures)]
+        '''
+        keys = []
+        if login:
+            keys.append((self._pair(login, ip), self.max_failures))
+        if ip:
+            keys.append(('i:' + str(ip), self.ip_max_failures))
+        return keys
+
+
+    def _pair(self, login, ip):
+        return 'p:%s|%s' % (str(login).lower(), ip or '')
+
+
+    def check(self, login, ip=None):
+        '''
+        Raise `LoginThrottledException` if login or ip is currently blocked. No db access.
+        '''
+        if not self.enabled:
+            return
+        now = self.clock()
+        for key, _ in self._keys(login, ip):
+            counter = self.counters.get(key)
+            if counter and counter.blocked_until > now:
+                raise LoginThrottledException(int(counter.blocked_until - now) + 1)
+
+
+    def failure(self, login, ip=None):
+        if not self.enabled:
+            return
+        now = self.clock()
+        with self.lock:
+            if len(self.counters) >= self.max_keys:
+                self._prune(now)
+            for key, max_failures in self._keys(login, ip):
+                counter = self.counters.get(key)
+                if counter is None:
+                    counter = self.counters[key] = _Counter(now)
+                counter.roll(now, self.window)
+                counter.current += 1
+                excess = counter.count(now, self.window) - max_failures
+                if excess >= 0:
+                    delay = min(self.max_backoff, self.backoff * 2 ** min(int(excess), 30))
+                    counter.blocked_until = now + delay
+                    _logger.warning(f'Login throttled [{key}] for {delay}s')
+
+
+    def success(self, login, ip=None):
+        # only the pair is reset: one valid password must not clear an ip spraying other logins
+        if not self.enabled or not login:
+            return
+        with self.lock:
+            self.counters.pop(self._pair(login, ip), None)
+
+
+    def _prune(self, now):
+        for key, counter in list(self.counters.items()):
+            if counter.blocked_until <= now and counter.count(now, self.window) < 1:
+                del self.counters[key]
+        # still full: drop everything rather than grow unbounded
+        if len(self.counters) >= self.max_keys:
+            self.counters.clear()
+
+
+login_throttle = LoginThrottle()
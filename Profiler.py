@@ -0,0 +1,119 @@
+import contextlib
+import hashlib
+import hmac
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from .QueryBudget import RequestStats
+from . import util
+
+import logging
+_logger = logging.getLogger(__name__)
+
+
+def signature(path, ts=None):
+    '''
+    Value of the `X-Jwt-Profile` header that enables profiling of `path`: `<ts>:<hmac>`,
+    valid for `ODOO_JWT_PROFILE_SIGNATURE_TTL` seconds around `ts` (default: now)
+    '''
+    ts = int(time.time() if ts is None else ts)
+    message = 'profile:%d:%s' % (ts, path)
+    return '%d:%s' % (ts, hmac.new(util.key().encode('utf-8'), message.encode('utf-8'), hashlib.sha256).hexdigest())
+
+
+class Profile(RequestStats):
+    '''
+    Profile of a single request: cProfile stats of the whole chain, plus time and sql per section
+    (middleware alias or controller).
+    '''
+
+    def __init__(self, path):
+        super().__init__(path)
+        import cProfile
+        self.profile = cProfile.Profile()
+
+
+class Profiler:
+    '''
+    On-demand profiling of decorated routes.
+
+    A request is profiled if it carries a valid `X-Jwt-Profile` header (see `signature`)
+    or is sampled by `ODOO_JWT_PROFILE_RATE` (0 to 1). Results are written to
+    `ODOO_JWT_PROFILE_DIR`, keeping only the `ODOO_JWT_PROFILE_MAX_FILES` latest profiles.
+    '''
+
+    def __init__(self):
+        self.rate = util.setting('profile_rate', 0.0, float)
+        self.directory = util.setting('profile_dir', os.path.join(tempfile.gettempdir(), 'jwt_provider_profiles'))
+        self.max_files = util.setting('profile_max_files', 50, int)
+        self.signature_ttl = util.setting('profile_signature_ttl', 300, int)
+
+
+    def start(self, path, headers):
+        '''
+        Return a started `Profile` if the request must be profiled, else None.
+        '''
+        if not self.signed(path, headers.get('X-Jwt-Profile')):
+            if not self.rate or random.random() >= self.rate:
+                return None
+        profile = Profile(path)
+        profile.profile.enable()
+        return profile
+
+
+    def signed(self, path, header):
+        '''
+        Check a `X-Jwt-Profile` header. Always False without `ODOO_JWT_KEY`, anyone could sign.
+        '''
+        if not header or not util.key():
+            return False
+        ts, _, _ = header.partition(':')
+        try:
+            ts = int(ts)
+        except ValueError:
+            return False
+        if abs(time.time() - ts) > self.signature_ttl:
+            return False
+        return hmac.compare_digest(header, signature(path, ts))
+
+
+    def stop(self, profile: Profile):
+        profile.profile.disable()
+        try:
+            self.write(profile)
+        except Exception as e:
+            _logger.warning(f'Profiler: {str(e)}')
+
+
+    def write(self, profile: Profile):
+        os.makedirs(self.directory, exist_ok=True)
+        # several profiles of a route may end in the same second, in the same worker (threads)
+        name = '%s-%d-%s-%s' % (
+            time.strftime('%Y%m%d-%H%M%S', time.gmtime(profile.started)),
+            os.getpid(),
+            profile.path.strip('/').replace('/', '_') or 'root',
+            uuid.uuid4().hex[:8],
+        )
+        base = os.path.join(self.directory, name)
+        profile.profile.dump_stats(base + '.prof')
+        with open(base + '.json', 'w') as f:
+            json.dump(profile.summary(), f, indent=2)
+        _logger.info(f'Profiler: {profile.path} profiled to {base}.prof')
+        self.rotate()
+
+
+    def rotate(self):
+        files = [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith('.prof')]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=os.path.getmtime)
+        for f in files[:len(files) - self.max_files]:
+            for path in (f, f[:-len('.prof')] + '.json'):
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+
+
+profiler = Profiler()
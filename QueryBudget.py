@@ -0,0 +1,123 @@
+import contextlib
+import threading
+import time
+from . import util
+
+import logging
+_logger = logging.getLogger(__name__)
+
+
+def sql_counters():
+    '''
+    (query count, query time) of the current thread, maintained by odoo's cursors
+    '''
+    thread = threading.current_thread()
+    return getattr(thread, 'query_count', 0), getattr(thread, 'query_time', 0.0)
+
+
+def _ensure_counters():
+    # odoo only counts queries on threads having these attributes (set for http requests)
+    thread = threading.current_thread()
+    if not hasattr(thread, 'query_count'):
+        thread.query_count = 0
+        thread.query_time = 0.0
+
+
+class RequestStats:
+    '''
+    Time, sql query count and sql time of a request, per section (middleware alias or controller).
+    '''
+
+    def __init__(self, path):
+        _ensure_counters()
+        self.path = path
+        self.sections = []
+        self.started = time.time()
+
+    @contextlib.contextmanager
+    def section(self, name):
+        count, sql_time = sql_counters()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end_count, end_sql_time = sql_counters()
+            self.sections.append({
+                'name': name,
+                'time': time.perf_counter() - start,
+                'sql_count': end_count - count,
+                'sql_time': end_sql_time - sql_time,
+            })
+
+    def sql_count(self):
+        return sum(s['sql_count'] for s in self.sections)
+
+    def sql_time(self):
+        return sum(s['sql_time'] for s in self.sections)
+
+    def summary(self):
+        return {
+            'path': self.path,
+            'started': self.started,
+            'sections': self.sections,
+            'time': sum(s['time'] for s in self.sections),
+            'sql_count': self.sql_count(),
+            'sql_time': self.sql_time(),
+        }
+
+
+class QueryBudget:
+    '''
+    Per-request sql accounting of decorated routes, logged when over budget.
+
+    Enabled by `ODOO_JWT_QUERY_BUDGET` (max queries) and/or `ODOO_JWT_QUERY_TIME_BUDGET` (max sql seconds).
+    '''
+
+    def __init__(self):
+        self.max_count = util.setting('query_budget', 0, int)
+        self.max_time = util.setting('query_time_budget', 0.0, float)
+
+
+    def start(self, path):
+        '''
+        Return a `RequestStats` if accounting is enabled, else None.
+        '''
+        if not self.max_count and not self.max_time:
+            return None
+        return RequestStats(path)
+
+
+    def check(self, stats: RequestStats):
+        count, sql_time = stats.sql_count(), stats.sql_time()
+        if (self.max_count and count > self.max_count) or (self.max_time and sql_time > self.max_time):
+            detail = ', '.join(f"{s['name']}: {s['sql_count']} ({s['sql_time'] * 1000:.1f}ms)" for s in stats.sections)
+            _logger.warning(f'Query budget exceeded on {stats.path}: {count} queries ({sql_time * 1000:.1f}ms) - {detail}')
+            return False
+        return True
+
+
+@contextlib.contextmanager
+def assert_max_queries(max_count, name='', cr=None):
+    '''
+    Test helper, fail if the block runs more than `max_count` sql queries.
+
+        with assert_max_queries(3, 'jwt'):
+            jwt_auth(jwt_request)
+
+    Queries are counted on the current thread, or on `cr` when given: e.g. the cursor of an `HttpCase`,
+    that requests served by another thread share.
+    '''
+    if cr is not None:
+        count = cr.sql_log_count
+        yield
+        used = cr.sql_log_count - count
+    else:
+        _ensure_counters()
+        count, _ = sql_counters()
+        yield
+        used = sql_counters()[0] - count
+    if used > max_count:
+        raise AssertionError(f'{name or "block"} ran {used} queries, expected at most {max_count}')
+
+
+query_budget = QueryBudget()
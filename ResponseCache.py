@@ -0,0 +1,158 @@
+import collections
+import threading
+import time
+from .TokenRevocation import send, revocation_listener
+
+import logging
+_logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    '''
+    Interface of a response cache store. Subclass it to plug another store (e.g., redis).
+
+    Values are opaque to the backend, expiration is handled by `ResponseCache`.
+    '''
+
+    def get(self, key):
+        raise NotImplementedError()
+
+    def set(self, key, value):
+        raise NotImplementedError()
+
+    def delete(self, key):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+
+class LRUCacheBackend(CacheBackend):
+    '''
+    Bounded in-process store, least recently used entries are dropped first.
+    '''
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class ResponseCache:
+    '''
+    Serialized responses of decorated routes, see the `cache` middleware.
+
+    Invalidation by model is done with version counters: writing a model bumps its version,
+    entries stored with an older version of any of their models are treated as misses.
+
+    Versions are bumped once the write is committed, in every worker (through NOTIFY),
+    and only for models this worker caches responses of.
+    '''
+
+    CHANNEL = 'jwt_provider_cache'
+
+    def __init__(self, backend: CacheBackend = None):
+        self.backend = backend or LRUCacheBackend()
+        # { model name: version }
+        self.versions = collections.defaultdict(int)
+        self.hits = 0
+        self.misses = 0
+        self.listening = False
+
+
+    def set_backend(self, backend: CacheBackend):
+        self.backend = backend
+
+
+    def get(self, key):
+        entry = self.backend.get(key)
+        if entry is not None:
+            expires, versions, value = entry
+            if expires > time.monotonic() and all(self.versions[m] == v for m, v in versions.items()):
+                self.hits += 1
+                return value
+            self.backend.delete(key)
+        self.misses += 1
+        return None
+
+
+    def snapshot(self, models=()):
+        '''
+        Versions of `models`, to take before the response is computed:
+        a write committed meanwhile makes the stored entry stale right away.
+        '''
+        if not self.listening:
+            self.listening = True
+            revocation_listener.subscribe(self.CHANNEL, self._notified)
+        return {m: self.versions[m] for m in models}
+
+
+    def set(self, key, value, ttl=60, versions=None):
+        self.backend.set(key, (time.monotonic() + ttl, versions or {}, value))
+
+
+    def invalidate(self, model):
+        '''
+        Invalidate every entry depending on `model`, in this worker only.
+        '''
+        if model in self.versions:
+            self.versions[model] += 1
+
+
+    def invalidate_on_commit(self, cr, model):
+        '''
+        Invalidate entries depending on `model` in every worker, once `cr` is committed.
+        Cheap, safe to call on each write.
+        '''
+        if model not in self.versions:
+            return
+        models = cr.postcommit.data.setdefault('jwt_provider.response_cache', set())
+        if not models:
+            # once per transaction
+            @cr.postcommit.add
+            def invalidate():
+                for m in models:
+                    self.invalidate(m)
+                send(self.CHANNEL, [{'models': sorted(models)}])
+        models.add(model)
+
+
+    def _notified(self, message):
+        for model in message['models']:
+            self.invalidate(model)
+
+
+    def clear(self):
+        self.backend.clear()
+
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+response_cache = ResponseCache()
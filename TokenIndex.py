@@ -0,0 +1,211 @@
+import datetime
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import odoo
+from . import util
+
+import logging
+_logger = logging.getLogger(__name__)
+
+
+MAGIC = b'JWTI'
+# magic, capacity, count, loaded_at
+HEADER = struct.Struct('<4sIId')
+# digest, expires (epoch), user id, token id
+SLOT = struct.Struct('<16sqII')
+EMPTY = b'\0' * 16
+
+
+def digest(token):
+    return hashlib.sha256(token.encode('utf-8')).digest()[:16]
+
+
+def _epoch(value):
+    return int(value.replace(tzinfo=datetime.timezone.utc).timestamp())
+
+
+class TokenIndex:
+    '''
+    Read-only view of a shared-memory index of active tokens of one database:
+    a fixed-size open-addressing hash table, digest -> (token_id, uid, expires).
+
+    The file is rebuilt in a new file and atomically renamed over the old one by `TokenIndexLoader`,
+    so workers only need to remap when the file changes: reads are lock-free.
+
+    An index loaded more than `max_age` seconds ago is ignored, as if absent:
+    its loader is stuck or dead, and it may still contain revoked tokens.
+    '''
+
+    def __init__(self, directory, db, max_age=0):
+        self.path = os.path.join(directory, 'tokens_%s.idx' % db)
+        self.max_age = max_age
+        # (mmap, capacity, loaded_at), swapped as a whole
+        self.table = None
+        self.inode = None
+        self.checked_at = 0.0
+
+
+    def _remap(self):
+        now = time.monotonic()
+        if self.table is not None and now - self.checked_at < 1:
+            return
+        self.checked_at = now
+        try:
+            inode = os.stat(self.path).st_ino
+        except OSError:
+            self.table, self.inode = None, None
+            return
+        if inode == self.inode:
+            return
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, capacity, count, loaded_at = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            mapped.close()
+            return
+        self.table, self.inode = (mapped, capacity, loaded_at), inode
+
+
+    @property
+    def loaded_at(self):
+        '''
+        Wall clock time the mapped index was loaded from database at, 0 if none.
+        '''
+        self._remap()
+        table = self.table
+        return table[2] if table else 0.0
+
+
+    def probe(self, token):
+        '''
+        Return (token_id, uid, expires datetime) if token is indexed, else None.
+
+        A miss is not a rejection: the token may have been issued after the last load.
+        '''
+        self._remap()
+        table = self.table
+        if table is None:
+            return None
+        mapped, capacity, loaded_at = table
+        if self.max_age and time.time() - loaded_at > self.max_age:
+            return None
+        key = digest(token)
+        slot = int.from_bytes(key[:8], 'little') % capacity
+        for _ in range(capacity):
+            d, expires, uid, token_id = SLOT.unpack_from(mapped, HEADER.size + slot * SLOT.size)
+            if d == key:
+                return token_id, uid, datetime.datetime.utcfromtimestamp(expires)
+            if d == EMPTY:
+                return None
+            slot = (slot + 1) % capacity
+        return None
+
+
+    @staticmethod
+    def build(path, rows, loaded_at=None):
+        '''
+        Write an index of `rows` [(token, token_id, uid, expires datetime)] to `path`, atomically.
+
+        `loaded_at` must be taken before `rows` are queried: changes committed earlier are in the index.
+        '''
+        capacity = 1024
+        while capacity < len(rows) * 2:
+            capacity *= 2
+        buffer = bytearray(HEADER.size + capacity * SLOT.size)
+        HEADER.pack_into(buffer, 0, MAGIC, capacity, len(rows), loaded_at or time.time())
+        for token, token_id, uid, expires in rows:
+            key = digest(token)
+            slot = int.from_bytes(key[:8], 'little') % capacity
+            while buffer[HEADER.size + slot * SLOT.size:HEADER.size + slot * SLOT.size + 16] != EMPTY:
+                slot = (slot + 1) % capacity
+            SLOT.pack_into(buffer, HEADER.size + slot * SLOT.size, key, _epoch(expires), uid, token_id)
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp, 'wb') as f:
+            f.write(buffer)
+        os.replace(tmp, path)
+
+
+class TokenIndexLoader:
+    '''
+    Keep shared token indexes of every database seen by this worker up to date.
+
+    All workers run a loader thread, but only the one holding the lock file loads from database;
+    if it dies, the lock is released and another worker takes over.
+
+    Enabled by `ODOO_JWT_SHM_DIR` (e.g. `/dev/shm/jwt_provider`), refreshed every `ODOO_JWT_SHM_REFRESH` seconds.
+    '''
+
+    def __init__(self):
+        self.directory = util.setting('shm_dir', '')
+        self.refresh = util.setting('shm_refresh', 30, int)
+        self.indexes = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.lock_file = None
+
+
+    def get(self, db):
+        '''
+        Return the `TokenIndex` of `db`, or None if shared index is disabled.
+        '''
+        if not self.directory:
+            return None
+        index = self.indexes.get(db)
+        if index is None:
+            with self.lock:
+                # missing two loads in a row means the loader is stuck
+                index = self.indexes.setdefault(db, TokenIndex(self.directory, db, max_age=2 * self.refresh))
+                # tell the loader, which may run in another worker, that this database is used
+                os.makedirs(self.directory, exist_ok=True)
+                open(os.path.join(self.directory, '%s.db' % db), 'a').close()
+                if not self.thread or not self.thread.is_alive():
+                    self.thread = threading.Thread(target=self._run, name='jwt_provider.token_index', daemon=True)
+                    self.thread.start()
+        return index
+
+
+    def _acquire(self):
+        if self.lock_file:
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        f = open(os.path.join(self.directory, 'loader.lock'), 'w')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self.lock_file = f
+        return True
+
+
+    def _run(self):
+        while True:
+            try:
+                if self._acquire():
+                    for f in os.listdir(self.directory):
+                        if f.endswith('.db'):
+                            self.load(f[:-len('.db')])
+            except Exception as e:
+                _logger.warning(f'Token index: {str(e)}')
+            time.sleep(self.refresh)
+
+
+    def load(self, db):
+        loaded_at = time.time()
+        with odoo.registry(db).cursor() as cr:
+            cr.execute('''
+                SELECT t.token, t.id, t.user_id, t.expires
+                FROM jwt_provider_access_token t
+                JOIN res_users u ON u.id = t.user_id
+                WHERE t.expires > (now() at time zone 'UTC') AND u.active
+            ''')
+            rows = cr.fetchall()
+        TokenIndex.build(TokenIndex(self.directory, db).path, rows, loaded_at)
+
+
+token_indexes = TokenIndexLoader()
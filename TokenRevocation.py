@@ -0,0 +1,117 @@
+import json
+import select
+import threading
+import time
+import odoo
+from .TokenIndex import digest
+
+import logging
+_logger = logging.getLogger(__name__)
+
+
+CHANNEL = 'jwt_provider_revoke'
+# stay well below postgres' 8000 bytes payload limit
+BATCH = 200
+
+
+def send(channel, messages):
+    '''
+    NOTIFY `messages` (json-serializable) on `channel` to every worker, now. Never raises.
+
+    Like odoo's bus, notifications go through the `postgres` database, so one listener per worker
+    serves all databases.
+    '''
+    try:
+        with odoo.sql_db.db_connect('postgres').cursor() as cr:
+            for message in messages:
+                cr.execute('SELECT pg_notify(%s, %s)', [channel, json.dumps(message)])
+    except Exception as e:
+        # runs after commit: must not fail the request nor skip other postcommit callbacks.
+        # a missed notification is covered by the cache ttl and by the next load of the shared index
+        _logger.warning(f'Notify [{channel}]: {str(e)}')
+
+
+def notify(cr, channel, messages):
+    '''
+    `send` messages once `cr` is committed.
+    '''
+    if messages:
+        cr.postcommit.add(lambda: send(channel, messages))
+
+
+def notify_revoked(cr, tokens):
+    '''
+    Tell every worker, once `cr` is committed, that `tokens` were deleted or had their expiry changed.
+    '''
+    digests = [digest(t).hex() for t in tokens if t]
+    notify(cr, CHANNEL, [
+        {'db': cr.dbname, 'tokens': digests[i:i + BATCH]}
+        for i in range(0, len(digests), BATCH)
+    ])
+
+
+class RevocationListener:
+    '''
+    LISTEN to notification channels in a background thread, with one connection per worker.
+
+    Revoked tokens (see `start`) and response cache invalidations use it.
+    '''
+
+    def __init__(self):
+        # { channel: callback(message) }
+        self.callbacks = {}
+        self.thread = None
+        self.lock = threading.Lock()
+
+
+    def subscribe(self, channel, callback):
+        with self.lock:
+            self.callbacks[channel] = callback
+            # started lazily, so that every prefork worker gets its own listener
+            if not self.thread or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='jwt_provider.revocation', daemon=True)
+                self.thread.start()
+
+
+    def start(self, callback):
+        '''
+        Hand revoked token digests to `callback(db, digests)`.
+        '''
+        self.subscribe(CHANNEL, lambda message: callback(message['db'], [bytes.fromhex(d) for d in message['tokens']]))
+
+
+    def _run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                _logger.warning(f'Revocation listener: {str(e)}, reconnecting')
+                time.sleep(5)
+
+
+    def _listen(self):
+        listened = set()
+        with odoo.sql_db.db_connect('postgres').cursor() as cr:
+            conn = cr._cnx
+            while True:
+                for channel in list(self.callbacks):
+                    if channel not in listened:
+                        cr.execute('LISTEN %s' % channel)
+                        cr.commit()
+                        listened.add(channel)
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    self._dispatch(notification.channel, notification.payload)
+
+
+    def _dispatch(self, channel, payload):
+        try:
+            self.callbacks[channel](json.loads(payload))
+        except Exception as e:
+            _logger.warning(f'Revocation listener: invalid message on {channel}: {str(e)}')
+
+
+revocation_listener = RevocationListener()
@@ -0,0 +1,80 @@
+import atexit
+import datetime
+import threading
+import time
+import odoo
+from . import util
+
+import logging
+_logger = logging.getLogger(__name__)
+
+
+class TokenUsage:
+    '''
+    Track when and from where tokens are used, without writing on every request.
+
+    Hits are kept in memory and flushed to `jwt_provider.access_token` by a background
+    thread, using one batched UPDATE per database per interval.
+    Repeated hits on the same token between two flushes are coalesced (the latest one wins).
+    '''
+
+    def __init__(self):
+        self.enabled = util.setting('usage_tracking', True, bool)
+        # seconds between two flushes
+        self.interval = util.setting('usage_flush_interval', 60, int)
+        # { db: { token_id: (used_at, ip) } }
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        # pending hits would be lost on worker recycle
+        atexit.register(self.flush)
+
+
+    def hit(self, db, token_id, ip=None):
+        '''
+        Record a token usage. Cheap, never touches the database.
+        '''
+        if not self.enabled or not db or not token_id:
+            return
+        with self.lock:
+            self.pending.setdefault(db, {})[token_id] = (datetime.datetime.utcnow(), ip)
+            # started lazily, so that every prefork worker gets its own flusher
+            if not self.thread or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='jwt_provider.token_usage', daemon=True)
+                self.thread.start()
+
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+    def flush(self):
+        '''
+        Write pending hits to database, one UPDATE per database.
+        '''
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for db, hits in pending.items():
+            if not hits:
+                continue
+            rows = []
+            params = []
+            for token_id, (used_at, ip) in hits.items():
+                rows.append('(%s::integer, %s::timestamp, %s::varchar)')
+                params.extend([token_id, used_at, ip])
+            try:
+                with odoo.registry(db).cursor() as cr:
+                    cr.execute('''
+                        UPDATE jwt_provider_access_token t
+                        SET last_used = GREATEST(t.last_used, v.last_used),
+                            last_ip = CASE WHEN t.last_used > v.last_used THEN t.last_ip ELSE v.last_ip END
+                        FROM (VALUES %s) AS v(id, last_used, last_ip)
+                        WHERE t.id = v.id
+                    ''' % ', '.join(rows), params)
+            except Exception as e:
+                _logger.warning(f'Token usage flush [{db}]: {str(e)}')
+
+
+token_usage = TokenUsage()
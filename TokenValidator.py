@@ -0,0 +1,226 @@
+import datetime
+import threading
+import time
+import odoo
+from .TokenUsage import token_usage
+from .TokenIndex import token_indexes, digest
+from .TokenRevocation import revocation_listener
+from .Replica import replicas
+from . import util
+
+import logging
+_logger = logging.getLogger(__name__)
+
+
+class TokenValidator:
+    '''
+    Check tokens against `jwt_provider.access_token` of one database.
+
+    Queries run on the given cursor, or on a cursor of the database's own registry,
+    so a token can be verified without the request being bound to that database.
+
+    Positive lookups may be cached in process for `ODOO_JWT_TOKEN_CACHE_TTL` seconds (disabled by default).
+    Revoked tokens are evicted from cache, and masked in the shared index until it is reloaded
+    after their revocation, as soon as `RevocationListener` is notified.
+    '''
+
+    def __init__(self, db):
+        self.db = db
+        self.ttl = util.setting('token_cache_ttl', 0, int)
+        self.max_size = util.setting('token_cache_size', 10000, int)
+        # { digest: (token_id, uid, expires, cached_at) }
+        self.cache = {}
+        # { digest: revoked_at (wall clock) }, masks shared index entries
+        self.revoked = {}
+        self.lock = threading.Lock()
+
+
+    def verify(self, token, cr=None, ip=None):
+        '''
+        Check if token existed in db, is not expired and its user is active.
+
+        Return the user id on success, else False.
+        '''
+        if not token:
+            return False
+        found = self._cached(token) or self._indexed(token)
+        if not found:
+            found = self._lookup(token, cr)
+            if not found:
+                return False
+            self._store(token, found)
+        token_id, uid, expires = found
+        if datetime.datetime.utcnow() > expires:
+            self.evict(token)
+            return False
+        token_usage.hit(self.db, token_id, ip)
+        return uid
+
+
+    def _lookup(self, token, cr=None):
+        query = '''
+            SELECT t.id, t.user_id, t.expires
+            FROM jwt_provider_access_token t
+            JOIN res_users u ON u.id = t.user_id
+            WHERE t.token = %s AND u.active
+        '''
+        rows = self._fetch(query, [token], cr, expected=1)
+        if len(rows) != 1:
+            return None
+        return rows[0]
+
+
+    def lookup_many(self, tokens, cr=None):
+        '''
+        Look tokens up with a single query, plus one on the primary for tokens missing from the replica.
+
+        Return { token: (token_id, uid, expires) } for tokens existing with an active user.
+        '''
+        tokens = list(set(tokens))
+        if not tokens:
+            return {}
+        query = '''
+            SELECT t.token, t.id, t.user_id, t.expires
+            FROM jwt_provider_access_token t
+            JOIN res_users u ON u.id = t.user_id
+            WHERE t.token IN %s AND u.active
+        '''
+        found = {row[0]: tuple(row[1:]) for row in self._fetch_replica(query, [tuple(tokens)]) or ()}
+        # only tokens the replica does not know yet go to the primary
+        missing = [t for t in tokens if t not in found]
+        if missing:
+            found.update({row[0]: tuple(row[1:]) for row in self._fetch_primary(query, [tuple(missing)], cr)})
+        return found
+
+
+    def _fetch(self, query, params, cr=None, expected=1):
+        '''
+        Run a read-only auth query, on the replica if configured and in sync.
+
+        Falls back to the primary when the replica fails or returns less than `expected` rows:
+        a freshly issued token may not be replicated yet.
+        '''
+        rows = self._fetch_replica(query, params)
+        if rows is not None and len(rows) >= expected:
+            return rows
+        return self._fetch_primary(query, params, cr)
+
+
+    def _fetch_replica(self, query, params):
+        '''
+        Return rows from the replica, or None if it is not configured, lagging or failing.
+        '''
+        replica = replicas.get(self.db)
+        if not replica or not replica.usable():
+            return None
+        try:
+            with replica.cursor() as replica_cr:
+                replica_cr.execute(query, params)
+                return replica_cr.fetchall()
+        except Exception as e:
+            replica.failed(e)
+            return None
+
+
+    def _fetch_primary(self, query, params, cr=None):
+        if cr is None:
+            with odoo.registry(self.db).cursor() as cr:
+                cr.execute(query, params)
+                return cr.fetchall()
+        cr.execute(query, params)
+        return cr.fetchall()
+
+
+    def _indexed(self, token):
+        index = token_indexes.get(self.db)
+        if index is None:
+            return None
+        if self.revoked:
+            revoked_at = self.revoked.get(digest(token))
+            if revoked_at is not None and revoked_at >= index.loaded_at:
+                return None
+        return index.probe(token)
+
+
+    def _cached(self, token):
+        if not self.ttl:
+            return None
+        entry = self.cache.get(digest(token))
+        if not entry:
+            return None
+        if time.monotonic() - entry[3] > self.ttl:
+            self.evict(token)
+            return None
+        return entry[:3]
+
+
+    def _store(self, token, found):
+        if not self.ttl:
+            return
+        with self.lock:
+            if len(self.cache) >= self.max_size:
+                self.cache.clear()
+            self.cache[digest(token)] = (*found, time.monotonic())
+
+
+    def evict(self, token):
+        with self.lock:
+            self.cache.pop(digest(token), None)
+
+
+    def revoke(self, digests):
+        '''
+        Forget tokens deleted or changed by another worker (see `TokenRevocation`).
+        '''
+        # compared with the index's loaded_at, written by another process
+        now = time.time()
+        index = token_indexes.get(self.db)
+        # an index loaded after the revocation no longer contains them
+        loaded_at = index.loaded_at if index else now
+        with self.lock:
+            for d in digests:
+                self.cache.pop(d, None)
+                if index:
+                    self.revoked[d] = now
+            for d, revoked_at in list(self.revoked.items()):
+                if revoked_at < loaded_at:
+                    del self.revoked[d]
+
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+
+class TokenValidators:
+    '''
+    One `TokenValidator` per database, so a worker can serve many tenant databases.
+    '''
+
+    def __init__(self):
+        self.validators = {}
+        self.lock = threading.Lock()
+
+
+    def get(self, db) -> TokenValidator:
+        validator = self.validators.get(db)
+        if validator is None:
+            with self.lock:
+                validator = self.validators.setdefault(db, TokenValidator(db))
+            # local token state must follow revocations made by other workers
+            if validator.ttl or token_indexes.directory:
+                revocation_listener.start(self.revoke)
+        return validator
+
+
+    def revoke(self, db, digests):
+        validator = self.validators.get(db)
+        if validator:
+            validator.revoke(digests)
+
+
+    def all(self):
+        return list(self.validators.values())
+
+
+token_validators = TokenValidators()
@@ -1,6 +1,15 @@
 # -*- coding: utf-8 -*-
 
 from . import JwtRequest
+from . import TokenUsage
+from . import TokenIndex
+from . import TokenRevocation
+from . import Replica
+from . import TokenValidator
+from . import ResponseCache
+from . import QueryBudget
+from . import Profiler
+from . import LoginThrottle
 from . import util
 from . import middleware
 from . import middlewares
@@ -3,3 +3,4 @@
 from . import api_http
 from . import api_json
 from . import web
+from . import introspection
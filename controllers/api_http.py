@@ -1,9 +1,8 @@
 # -*- coding: utf-8 -*-
-import werkzeug
 from odoo import http
 from odoo.http import request
-from odoo.addons.auth_signup.models.res_users import SignupError
 from ..JwtRequest import jwt_request
+from .. import util
 from ..util import is_valid_email
 
 
@@ -15,10 +14,12 @@ SENSITIVE_FIELDS = ['password', 'password_crypt', 'new_password', 'create_uid',
 
 class JwtController(http.Controller):
 
-    @http.route('/api/http/hello', type='http', auth='public', csrf=False, cors='*')
-    @jwt_request.middlewares('api_key')
-    def hello(self, **kw):
-        return jwt_request.response({ 'message': 'hello!', 'key_info': jwt_request.data.get('key_info') })
+    # uses the sample `api_key` middleware, only registered with ODOO_JWT_DEMO=1
+    if util.setting('demo', False, bool):
+        @http.route('/api/http/hello', type='http', auth='public', csrf=False, cors='*')
+        @jwt_request.middlewares('api_key')
+        def hello(self, **kw):
+            return jwt_request.response({ 'message': 'hello!', 'key_info': jwt_request.data.get('key_info') })
 
 
     # @http.route('/api/http/login', type='http', auth='public', csrf=False, cors='*', methods=['POST'])
@@ -86,6 +87,7 @@ class JwtController(http.Controller):
     #     '''
     #     Sign up using auth_signup modules
     #     '''
+    #     from odoo.addons.auth_signup.models.res_users import SignupError
     #     if not is_valid_email(email):
     #         return jwt_request.response(status=400, data={'message': 'Invalid email address'})
     #     if not name:
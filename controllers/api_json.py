@@ -2,7 +2,6 @@
 from ..middlewares import require_groups
 from odoo import http
 from odoo.http import request
-from odoo.addons.auth_signup.models.res_users import SignupError
 from ..JwtRequest import jwt_request
 from ..util import is_valid_email
 
@@ -15,7 +14,7 @@ SENSITIVE_FIELDS = ['password', 'password_crypt', 'new_password', 'create_uid',
 
 class JwtRPCController(http.Controller):
 
-    @http.route('/api/rpc/hello', type='json', auth='public', csrf=False, cors='*')
+    @http.route('/api/rpc/hello', type='json', auth='public', csrf=False, cors='*', save_session=False)
     @jwt_request.middlewares()
     def hello(self, **kw):
         '''
@@ -32,6 +31,15 @@ class JwtRPCController(http.Controller):
         return jwt_request.response({ 'message': 'hello!', 'key_info': jwt_request.data.get('key_info') })
 
 
+    @http.route('/api/rpc/batch', type='json', auth='public', csrf=False, cors='*', save_session=False)
+    def batch(self, calls=[], **kw):
+        '''
+        Dispatch many rpc calls, authenticating once:
+        `{"params": {"calls": [{"id": 1, "route": "/api/rpc/me", "params": {}}, ...]}}`
+        '''
+        return jwt_request.batch(calls, 'jwt')
+
+
     # @http.route('/api/rpc/login', type='json', auth='public', csrf=False, cors='*', methods=['POST'])
     # def login(self, email, password, **kw):
     #     token = jwt_request.login(email, password)
@@ -99,6 +107,7 @@ class JwtRPCController(http.Controller):
     #     '''
     #     Sign up using auth_signup modules
     #     '''
+    #     from odoo.addons.auth_signup.models.res_users import SignupError
     #     if not is_valid_email(email):
     #         return jwt_request.response(status=400, data={'message': 'Invalid email address'})
     #     if not name:
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import time
+from odoo import http
+from odoo.http import request
+from ..JwtRequest import jwt_request
+from .. import util
+
+
+import logging
+_logger = logging.getLogger(__name__)
+
+
+class IntrospectionController(http.Controller):
+
+    @http.route('/api/introspect', type='http', auth='none', csrf=False, methods=['POST'], save_session=False)
+    @jwt_request.pure_middlewares('introspection_key')
+    def introspect(self, **kw):
+        '''
+        Batch token introspection for downstream services.
+
+        Body: form encoded (as RFC 7662), one `token` field per token to introspect.
+        '''
+        tokens = request.httprequest.form.getlist('token')
+        if not tokens:
+            return jwt_request.http_response({'message': 'Missing token'}, 400)
+        max_tokens = util.setting('introspection_max_tokens', 1000, int)
+        if len(tokens) > max_tokens:
+            return jwt_request.http_response({'message': 'Too many tokens'}, 400)
+
+        result = jwt_request.introspect(tokens)
+
+        # results may be reused until the first active token expires (stored expiry, see `introspect`)
+        max_age = util.setting('introspection_max_age', 60, int)
+        now = time.time()
+        for info in result:
+            if info['active'] and info.get('exp'):
+                max_age = min(max_age, max(0, int(info['exp'] - now)))
+        response = jwt_request.http_response({'tokens': result})
+        response.headers['Cache-Control'] = 'private, max-age=%d' % max_age
+        return response
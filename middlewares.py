@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 
 from .middleware.MiddlewareData import MiddlewareData
-import jwt
+import copy
+import hmac
+from . import util
+from .util import dumps
+from odoo.http import Response
+from .ResponseCache import response_cache
 from .JwtRequest import JwtRequest, jwt_request, InvalidTokenException
 from .middleware.MiddlewareException import MiddlewareException
 
@@ -9,6 +14,7 @@ import logging
 _logger = logging.getLogger(__name__)
 
 def jwt_auth(req: JwtRequest, *k, **kw):
+    import jwt
     try:
         req.validate_token(token=req.token, auth=True)
     except jwt.ExpiredSignatureError:
@@ -54,16 +60,78 @@ def api_key_middleware(req: JwtRequest, data: MiddlewareData, *k, **kw):
     })
 
 
+def introspection_key(req: JwtRequest, *k, **kw):
+    '''
+    Only allow callers with the api key set in `ODOO_JWT_INTROSPECTION_KEY`
+    '''
+    expected = util.setting('introspection_key', '')
+    api_key = req.headers.get('X-Api-Key') or ''
+    if not expected or not hmac.compare_digest(api_key, expected):
+        raise MiddlewareException('Invalid Api Key', 401, 'invalid_api_key')
+
+
 def logger(req: JwtRequest, *k, **kw):
     _logger.info('---Begin Request---')
     req.on_end(lambda req, res: _logger.info(f'---End Response: {str(res)}'))
 
 
+def cache(req: JwtRequest, *k, **kw):
+    '''
+    Respond from cache if possible, else cache the controller's response.
+
+    Param (dict, optional):
+    - `ttl`: seconds, default 60
+    - `vary`: header names to add to the key, besides route, user and params
+    - `models`: model names, writing any of them invalidates the entries
+
+    Place it after authentication middlewares, e.g., `('jwt', ('cache', {'ttl': 30, 'models': ['res.partner']}))`
+    '''
+    # a POST, PUT... of an http route must reach its controller. Json rpc is always POST
+    if not req.is_rpc() and req.method not in ('get', 'head'):
+        return
+    options = kw.get('param') or {}
+    vary = list(options.get('vary', [])) + ['Accept-Encoding']
+    key = dumps([
+        req.odoo_req.db,
+        req.method,
+        req.path,
+        req.odoo_req.uid,
+        req.body,
+        [req.headers.get(h) for h in vary],
+    ], sort_keys=True, default=str)
+
+    cached = response_cache.get(key)
+    # taken before the controller runs, so that a write committed meanwhile discards the entry
+    versions = response_cache.snapshot(options.get('models', []))
+    if cached is not None:
+        if isinstance(cached, dict):
+            return copy.deepcopy(cached)
+        body, status, headers = cached
+        tag = dict(headers).get('ETag')
+        if tag and req._etag_matches(req.headers.get('If-None-Match'), tag):
+            return Response(status=304, headers=[('ETag', tag)])
+        return Response(body, status=status, headers=headers)
+
+    def store(req, res):
+        if isinstance(res, dict):
+            # json rpc
+            if res.get('success'):
+                response_cache.set(key, copy.deepcopy(res), options.get('ttl', 60), versions)
+        elif isinstance(res, Response) and res.status_code == 200 and not res.is_streamed:
+            value = (res.get_data(), res.status_code, list(res.headers.items()))
+            response_cache.set(key, value, options.get('ttl', 60), versions)
+    req.on_end(store)
+
+
 # example of registering middleware handler
-jwt_request.register_middleware('api_key', api_key_middleware)
+# the sample `api_key` (hard-coded key) is only registered with ODOO_JWT_DEMO=1
+if util.setting('demo', False, bool):
+    jwt_request.register_middleware('api_key', api_key_middleware)
 jwt_request.register_middleware('jwt', jwt_auth)
 jwt_request.register_middleware('group', require_groups_alias)
 jwt_request.register_middleware('logger', logger)
+jwt_request.register_middleware('cache', cache)
+jwt_request.register_middleware('introspection_key', introspection_key)
 
 # these middleware will always run
 # but you need to decorate http method with @jwt_request.middlewares()
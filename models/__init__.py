@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
 
 from . import res_users
-from . import access_token 
\ No newline at end of file
+from . import access_token 
+from . import base
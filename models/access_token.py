@@ -1,18 +1,31 @@
 from odoo import models, fields, api
 from datetime import datetime, timedelta
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
+from ..TokenRevocation import notify_revoked
 
 class JwtAccessToken(models.Model):
     _name = 'jwt_provider.access_token'
     _description = 'Store user access token for one-time-login'
 
-    token = fields.Char('Access Token', required=True)
+    token = fields.Char('Access Token', required=True, index=True)
     user_id = fields.Many2one('res.users', string='User', required=True, ondelete='cascade')
     expires = fields.Datetime('Expires', required=True)
+    # written in batches by TokenUsage, never on the request itself
+    last_used = fields.Datetime('Last Used', readonly=True)
+    last_ip = fields.Char('Last IP', readonly=True)
 
     is_expired = fields.Boolean(compute='_compute_is_expired')
 
     @api.depends('expires')
     def _compute_is_expired(self):
         for token in self:
-            token.is_expired = datetime.now() > token.expires
\ No newline at end of file
+            token.is_expired = datetime.now() > token.expires
+
+    def write(self, vals):
+        if 'expires' in vals or 'token' in vals:
+            notify_revoked(self.env.cr, self.mapped('token'))
+        return super(JwtAccessToken, self).write(vals)
+
+    def unlink(self):
+        notify_revoked(self.env.cr, self.mapped('token'))
+        return super(JwtAccessToken, self).unlink()
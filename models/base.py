@@ -0,0 +1,24 @@
+from odoo import api, models
+from ..ResponseCache import response_cache
+
+
+class Base(models.AbstractModel):
+    _inherit = 'base'
+
+    # invalidate cached route responses depending on this model, once committed
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(Base, self).create(vals_list)
+        response_cache.invalidate_on_commit(self.env.cr, self._name)
+        return records
+
+    def write(self, vals):
+        res = super(Base, self).write(vals)
+        response_cache.invalidate_on_commit(self.env.cr, self._name)
+        return res
+
+    def unlink(self):
+        res = super(Base, self).unlink()
+        response_cache.invalidate_on_commit(self.env.cr, self._name)
+        return res
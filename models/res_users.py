@@ -21,7 +21,8 @@ class Users(models.Model):
         if user_id:
             return user_id
 
-        uid = jwt_request.verify(password)
+        # token may belong to another database than the request's one
+        uid = jwt_request.verify(password, db=db)
 
         return uid
 
@@ -31,7 +32,7 @@ class Users(models.Model):
             super(Users, self)._check_credentials(password, user_agent_env)
         except AccessDenied:
             # verify password as token
-            if not jwt_request.verify(password):
+            if not jwt_request.verify(password, db=self.env.cr.dbname, cr=self.env.cr):
                 raise
 
     @api.depends()
@@ -41,9 +42,7 @@ class Users(models.Model):
             u.avatar = werkzeug.urls.url_join(base, 'web/avatar/%d' % u.id)
 
     def to_dict(self, single=True):
-        res = []
-        for u in self:
-            d = u.read(['email', 'name', 'avatar', 'company_id'])[0]
-            res.append(d)
+        # one read for the whole recordset, e.g. a batch of `stream_response`
+        res = self.read(['email', 'name', 'avatar', 'company_id'])
 
         return res[0] if single else res
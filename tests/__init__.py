@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+from . import test_stateless
+from . import test_query_budget
+from . import test_login_throttle
+from . import test_import_time
+from . import test_batch
+from . import test_concurrent_middleware
@@ -0,0 +1,84 @@
+import datetime
+import json
+from odoo import http
+from odoo.http import request
+from odoo.tests import HttpCase
+from .. import util
+from ..JwtRequest import jwt_request
+
+
+def make_token(env, user, days=1):
+    '''
+    Sign and store a token for `user`, without going through a request
+    '''
+    now = datetime.datetime.utcnow()
+    exp = now + datetime.timedelta(days=days)
+    token = util.sign_token({
+        'exp': exp,
+        'iat': now,
+        'sub': user.id,
+        'lgn': user.login,
+        'db': env.cr.dbname,
+    })
+    env['jwt_provider.access_token'].sudo().create({
+        'user_id': user.id,
+        'expires': exp,
+        'token': token,
+    })
+    return token
+
+
+class TestController(http.Controller):
+    '''
+    Routes for tests only: this module is imported by the test runner, never by the addon.
+    Default `save_session`, unlike the shipped routes.
+    '''
+
+    @http.route('/api/test/jwt_provider/me', type='json', auth='public', csrf=False)
+    @jwt_request.middlewares('jwt')
+    def me(self, **kw):
+        return jwt_request.response({'uid': request.env.uid})
+
+    @http.route('/api/test/jwt_provider/admin', type='json', auth='public', csrf=False)
+    @jwt_request.middlewares(('group', ['base.group_system']))
+    def admin(self, **kw):
+        return jwt_request.response({'uid': request.env.uid})
+
+    @http.route('/api/test/jwt_provider/partner', type='json', auth='public', csrf=False)
+    @jwt_request.middlewares('jwt')
+    def partner(self, name, fail=False, **kw):
+        request.env['res.partner'].create({'name': name})
+        if fail:
+            raise ValueError('failing on purpose')
+        return jwt_request.response({'name': name})
+
+    @http.route('/api/test/jwt_provider/plain', type='json', auth='public', csrf=False)
+    def plain(self, **kw):
+        return {}
+
+
+class JwtHttpCase(HttpCase):
+    '''
+    Serves `TestController` and calls its json routes with a bearer token
+    '''
+
+    def setUp(self):
+        super().setUp()
+        # routes of controllers defined after the routing map was built
+        self.env['ir.http']._clear_routing_map()
+        self.addCleanup(self.env['ir.http']._clear_routing_map)
+
+    def set_stateless(self, stateless):
+        self.addCleanup(setattr, jwt_request, 'stateless', jwt_request.stateless)
+        jwt_request.stateless = stateless
+
+    def json_call(self, route, token, params=None):
+        response = self.url_open(route, data=json.dumps({
+            'jsonrpc': '2.0',
+            'params': params or {},
+        }), headers={
+            'Content-Type': 'application/json',
+            'Authorization': 'Bearer %s' % token,
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()['result']
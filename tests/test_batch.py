@@ -0,0 +1,78 @@
+from odoo.tests import tagged
+from ..JwtRequest import jwt_request
+from .common import JwtHttpCase, make_token
+
+
+@tagged('post_install', '-at_install')
+class TestBatch(JwtHttpCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin_token = make_token(self.env, self.env.ref('base.user_admin'))
+        user = self.env['res.users'].create({
+            'name': 'Batch User',
+            'login': 'jwt_provider_batch_user',
+            'groups_id': [(6, 0, [self.env.ref('base.group_user').id])],
+        })
+        self.user_token = make_token(self.env, user)
+
+    def batch(self, token, *calls):
+        result = self.json_call('/api/rpc/batch', token, {'calls': [
+            {'id': i, 'route': route, 'params': params} for i, (route, params) in enumerate(calls)
+        ]})
+        if not result['success']:
+            return result
+        self.assertEqual([r['id'] for r in result['data']], list(range(len(calls))))
+        return [r['result'] for r in result['data']]
+
+    def test_calls(self):
+        me, = self.batch(self.admin_token, ('/api/test/jwt_provider/me', {}))
+        self.assertTrue(me['success'])
+        self.assertEqual(me['data']['uid'], self.env.ref('base.user_admin').id)
+
+    def test_group_still_checked(self):
+        me, admin = self.batch(
+            self.user_token,
+            ('/api/test/jwt_provider/me', {}),
+            ('/api/test/jwt_provider/admin', {}),
+        )
+        self.assertTrue(me['success'])
+        self.assertEqual(admin['code'], 403)
+        admin, = self.batch(self.admin_token, ('/api/test/jwt_provider/admin', {}))
+        self.assertTrue(admin['success'])
+
+    def test_invalid_token(self):
+        result = self.batch('invalid', ('/api/test/jwt_provider/me', {}))
+        self.assertEqual(result['code'], 401)
+
+    def test_unknown_route(self):
+        unknown, = self.batch(self.admin_token, ('/api/test/jwt_provider/nope', {}))
+        self.assertEqual(unknown['code'], 404)
+
+    def test_route_cannot_be_batched(self):
+        plain, batch = self.batch(
+            self.admin_token,
+            ('/api/test/jwt_provider/plain', {}),
+            ('/api/rpc/batch', {'calls': []}),
+        )
+        self.assertEqual(plain['code'], 400)
+        self.assertEqual(batch['code'], 400)
+
+    def test_failing_call_rolled_back(self):
+        kept, failed = self.batch(
+            self.admin_token,
+            ('/api/test/jwt_provider/partner', {'name': 'jwt_provider batch kept'}),
+            ('/api/test/jwt_provider/partner', {'name': 'jwt_provider batch failed', 'fail': True}),
+        )
+        self.assertTrue(kept['success'])
+        self.assertEqual(failed['code'], 500)
+        Partner = self.env['res.partner']
+        self.assertTrue(Partner.search([('name', '=', 'jwt_provider batch kept')]))
+        self.assertFalse(Partner.search([('name', '=', 'jwt_provider batch failed')]))
+
+    def test_max_calls(self):
+        self.addCleanup(setattr, jwt_request, 'batch_max_calls', jwt_request.batch_max_calls)
+        jwt_request.batch_max_calls = 2
+        result = self.batch(self.admin_token, *[('/api/test/jwt_provider/me', {})] * 3)
+        self.assertEqual(result['code'], 413)
+        self.assertEqual(len(self.batch(self.admin_token, *[('/api/test/jwt_provider/me', {})] * 2)), 2)
@@ -0,0 +1,94 @@
+import threading
+import time
+from odoo.tests.common import BaseCase, tagged
+from ..JwtRequest import JwtRequest
+from ..middleware.MiddlewareException import MiddlewareException
+
+
+class StubRequest(JwtRequest):
+    '''
+    Middleware chain without odoo's request: responses are plain dicts
+    '''
+
+    def response(self, data={}, status=200):
+        return {'code': status, **data}
+
+
+def concurrent_middleware(handler):
+    handler.concurrent = True
+    return handler
+
+
+@tagged('post_install', '-at_install')
+class TestConcurrentMiddleware(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.req = StubRequest()
+        self.req.done = set()
+        self.log = []
+        self.lock = threading.Lock()
+
+    def record(self, name):
+        with self.lock:
+            self.log.append(name)
+
+    def sleeping(self, name, seconds, error=None):
+        @concurrent_middleware
+        def handler(req, data, param=None, **kw):
+            time.sleep(seconds)
+            self.record(name)
+            if error:
+                raise error
+        return handler
+
+    def test_run_together(self):
+        start = time.monotonic()
+        result = self.req._run_list([self.sleeping('a', 0.3), self.sleeping('b', 0.3)])
+        self.assertIsNone(result)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(sorted(self.log), ['a', 'b'])
+
+    def test_first_error_in_declaration_order(self):
+        result = self.req._run_list([
+            self.sleeping('slow', 0.2, MiddlewareException('first', 401)),
+            self.sleeping('fast', 0, MiddlewareException('second', 403)),
+        ])
+        self.assertEqual(result['code'], 401)
+        self.assertEqual(result['message'], 'first')
+        # both ran to completion before the response
+        self.assertEqual(self.log, ['fast', 'slow'])
+
+    def test_exception_in_pool_thread(self):
+        result = self.req._run_list([
+            self.sleeping('a', 0),
+            self.sleeping('b', 0, ValueError('unexpected')),
+        ])
+        self.assertEqual(result['code'], 400)
+
+    def test_serial_waits_for_concurrent(self):
+        def serial(req, data, param=None, **kw):
+            self.record('serial')
+
+        self.req._run_list([self.sleeping('a', 0.2), self.sleeping('b', 0.1), serial, self.sleeping('c', 0)])
+        self.assertEqual(self.log[:2], ['b', 'a'])
+        self.assertEqual(self.log[2:], ['serial', 'c'])
+
+    def test_error_stops_the_chain(self):
+        def serial(req, data, param=None, **kw):
+            self.record('serial')
+
+        result = self.req._run_list([
+            self.sleeping('a', 0, MiddlewareException('denied', 403)),
+            self.sleeping('b', 0),
+            serial,
+        ])
+        self.assertEqual(result['code'], 403)
+        self.assertNotIn('serial', self.log)
+
+    def test_timeout(self):
+        self.req.middleware_timeout = 0.1
+        start = time.monotonic()
+        result = self.req._run_list([self.sleeping('hung', 1), self.sleeping('fast', 0)])
+        self.assertEqual(result['code'], 504)
+        self.assertLess(time.monotonic() - start, 0.5)
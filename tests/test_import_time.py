@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+from odoo.tests.common import BaseCase, tagged
+
+
+# addon package, e.g. `odoo.addons.jwt_provider`
+PACKAGE = __name__.rsplit('.tests', 1)[0]
+# odoo itself is imported beforehand, only the addon's own import is measured
+SCRIPT = '''
+import sys
+import odoo, odoo.http, odoo.models, odoo.fields, odoo.api, odoo.tools, odoo.exceptions
+odoo.addons.__path__.append(sys.argv[1])
+before = set(sys.modules)
+import %s
+print('\\n'.join(set(sys.modules) - before))
+''' % PACKAGE
+# cumulative import time of the addon, in milliseconds
+BUDGET = 150
+# imported on first use only
+LAZY = ('jwt', 'simplejson', 'dateutil.parser', 'cProfile', 'brotli')
+
+
+@tagged('post_install', '-at_install')
+class TestImportTime(BaseCase):
+
+    def _import(self):
+        addons_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', SCRIPT, addons_dir],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        # `import time: self [us] | cumulative | imported package`
+        timings = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                timings[name.strip()] = int(cumulative) / 1000
+        self.assertIn(PACKAGE, timings)
+        return timings[PACKAGE], set(result.stdout.split())
+
+    def test_import_budget(self):
+        # best of 3, the first run may pay for cold disk caches
+        runs = [self._import() for _ in range(3)]
+        elapsed = min(run[0] for run in runs)
+        self.assertLessEqual(elapsed, BUDGET, f'{PACKAGE} took {elapsed:.1f}ms to import')
+
+    def test_lazy_imports(self):
+        _, imported = self._import()
+        self.assertIn(PACKAGE, imported)
+        for module in LAZY:
+            self.assertNotIn(module, imported, f'{module} must be imported on first use')
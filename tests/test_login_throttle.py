@@ -0,0 +1,112 @@
+from odoo.tests.common import BaseCase, tagged
+from ..LoginThrottle import LoginThrottle, LoginThrottledException
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def tick(self, seconds):
+        self.now += seconds
+
+
+@tagged('post_install', '-at_install')
+class TestLoginThrottle(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = Clock()
+        self.throttle = LoginThrottle(clock=self.clock)
+        self.throttle.enabled = True
+        self.throttle.max_failures = 3
+        self.throttle.ip_max_failures = 10
+        self.throttle.window = 60
+        self.throttle.backoff = 1
+        self.throttle.max_backoff = 900
+
+    def fail(self, login, ip, times=1):
+        for _ in range(times):
+            self.throttle.failure(login, ip)
+
+    def test_blocks_pair(self):
+        self.fail('admin', '10.0.0.1', 2)
+        self.throttle.check('admin', '10.0.0.1')
+        self.fail('admin', '10.0.0.1')
+        with self.assertRaises(LoginThrottledException) as e:
+            self.throttle.check('admin', '10.0.0.1')
+        self.assertGreaterEqual(e.exception.retry_after, 1)
+        # case insensitive login
+        with self.assertRaises(LoginThrottledException):
+            self.throttle.check('ADMIN', '10.0.0.1')
+
+    def test_login_not_locked_out_from_other_ip(self):
+        self.fail('admin', '10.0.0.1', 5)
+        self.throttle.check('admin', '10.0.0.2')
+
+    def test_ip_blocked_across_logins(self):
+        for i in range(10):
+            self.fail('user%d' % i, '10.0.0.1')
+        with self.assertRaises(LoginThrottledException):
+            self.throttle.check('someone', '10.0.0.1')
+        self.throttle.check('someone', '10.0.0.2')
+
+    def test_backoff_expires(self):
+        self.fail('admin', '10.0.0.1', 3)
+        with self.assertRaises(LoginThrottledException):
+            self.throttle.check('admin', '10.0.0.1')
+        self.clock.tick(1.5)
+        self.throttle.check('admin', '10.0.0.1')
+        # still in the window: next failure blocks longer
+        self.fail('admin', '10.0.0.1')
+        self.clock.tick(1.5)
+        with self.assertRaises(LoginThrottledException):
+            self.throttle.check('admin', '10.0.0.1')
+
+    def test_backoff_capped(self):
+        self.fail('admin', '10.0.0.1', 100)
+        with self.assertRaises(LoginThrottledException) as e:
+            self.throttle.check('admin', '10.0.0.1')
+        self.assertLessEqual(e.exception.retry_after, 901)
+
+    def test_window_slides(self):
+        self.fail('admin', '10.0.0.1', 2)
+        self.clock.tick(121)
+        self.fail('admin', '10.0.0.1', 2)
+        self.throttle.check('admin', '10.0.0.1')
+
+    def test_success_resets_pair_only(self):
+        for i in range(5):
+            self.fail('user%d' % i, '10.0.0.1')
+        self.fail('admin', '10.0.0.1', 2)
+        self.throttle.success('admin', '10.0.0.1')
+        self.fail('admin', '10.0.0.1', 2)
+        self.throttle.check('admin', '10.0.0.1')
+        # the ip kept its failures, one more reaches its limit
+        self.fail('other', '10.0.0.1')
+        with self.assertRaises(LoginThrottledException):
+            self.throttle.check('admin', '10.0.0.1')
+
+    def test_disabled(self):
+        self.throttle.enabled = False
+        self.fail('admin', '10.0.0.1', 20)
+        self.throttle.check('admin', '10.0.0.1')
+
+    def test_load_many_ips(self):
+        '''
+        A spraying flood stays bounded in memory, and blocked checks stay cheap.
+        '''
+        self.throttle.max_keys = 1000
+        for i in range(20000):
+            self.clock.tick(0.001)
+            self.fail('user%d' % (i % 50), '10.%d.%d.%d' % (i // 65536, i // 256 % 256, i % 256))
+        self.assertLessEqual(len(self.throttle.counters), 1000)
+        for i in range(10):
+            self.fail('victim', '192.168.0.1')
+        for _ in range(10000):
+            with self.assertRaises(LoginThrottledException):
+                self.throttle.check('victim', '192.168.0.1')
+        # the victim still logs in from elsewhere
+        self.throttle.check('victim', '10.255.255.1')
@@ -0,0 +1,96 @@
+import types
+import odoo
+from odoo import api, SUPERUSER_ID
+from odoo.tests import TransactionCase, tagged
+from ..JwtRequest import jwt_request
+from ..QueryBudget import assert_max_queries
+from ..TokenUsage import token_usage
+from ..middlewares import jwt_auth, require_groups_alias
+from .common import JwtHttpCase, make_token
+
+
+class FakeRequest:
+    '''
+    Just enough of odoo's request for middlewares to run on the test cursor
+    '''
+
+    def __init__(self, env):
+        self.cr = env.cr
+        self.db = env.cr.dbname
+        self.uid = None
+        self.session = types.SimpleNamespace(db=self.db)
+        self.httprequest = types.SimpleNamespace(remote_addr='127.0.0.1', environ={})
+
+    @property
+    def env(self):
+        return api.Environment(self.cr, self.uid or SUPERUSER_ID, {})
+
+
+@tagged('post_install', '-at_install')
+class TestQueryBudget(TransactionCase):
+    '''
+    Hot paths must not regress in number of queries, caches warmed up.
+    '''
+
+    def setUp(self):
+        super().setUp()
+        odoo.http._request_stack.push(FakeRequest(self.env))
+        self.addCleanup(odoo.http._request_stack.pop)
+        for name, value in (('stateless', True), ('done', set()), ('stats', None)):
+            self.addCleanup(setattr, jwt_request, name, getattr(jwt_request, name))
+            setattr(jwt_request, name, value)
+        # hits are flushed by another thread, on another cursor
+        self.addCleanup(setattr, token_usage, 'enabled', token_usage.enabled)
+        token_usage.enabled = False
+        self.user = self.env.ref('base.user_admin')
+        jwt_request.token = make_token(self.env, self.user)
+
+    def test_jwt_auth(self):
+        jwt_auth(jwt_request)
+        with assert_max_queries(1, 'jwt'):
+            jwt_auth(jwt_request)
+        self.assertEqual(jwt_request.odoo_req.uid, self.user.id)
+
+    def test_require_groups_alias(self):
+        require_groups_alias(jwt_request, param=['base.group_user'])
+        with assert_max_queries(2, 'group'):
+            require_groups_alias(jwt_request, param=['base.group_user'])
+
+    def test_create_token(self):
+        jwt_request.create_token(self.user)
+        with assert_max_queries(2, 'create_token'):
+            jwt_request.create_token(self.user)
+
+
+@tagged('post_install', '-at_install')
+class TestRequestQueryBudget(JwtHttpCase):
+    '''
+    Whole requests, counted on the test cursor the server thread shares.
+    In default mode, `session.authenticate` goes through `_login` and `_check_credentials`,
+    each verifying the token: a regression there shows up here only.
+    '''
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(setattr, token_usage, 'enabled', token_usage.enabled)
+        token_usage.enabled = False
+        self.user = self.env.ref('base.user_admin')
+        self.token = make_token(self.env, self.user)
+
+    def _call(self):
+        # a new session each time, as a client without cookies
+        self.opener.cookies.clear()
+        result = self.json_call('/api/test/jwt_provider/me', self.token)
+        self.assertEqual(result['data']['uid'], self.user.id)
+
+    def test_session_auth(self):
+        self.set_stateless(False)
+        self._call()
+        with assert_max_queries(20, 'session auth', cr=self.cr):
+            self._call()
+
+    def test_stateless_auth(self):
+        self.set_stateless(True)
+        self._call()
+        with assert_max_queries(10, 'stateless auth', cr=self.cr):
+            self._call()
@@ -0,0 +1,34 @@
+import odoo
+from odoo.tests import tagged
+from .common import JwtHttpCase, make_token
+
+
+@tagged('post_install', '-at_install')
+class TestStateless(JwtHttpCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.env.ref('base.user_admin')
+        self.token = make_token(self.env, self.user)
+        self.store = odoo.http.root.session_store
+
+    def _new_sessions(self, calls=3):
+        before = set(self.store.list())
+        for _ in range(calls):
+            result = self.json_call('/api/test/jwt_provider/me', self.token)
+            self.assertTrue(result['success'])
+            self.assertEqual(result['data']['uid'], self.user.id)
+        return set(self.store.list()) - before
+
+    def test_no_session_written(self):
+        self.set_stateless(True)
+        self.assertEqual(self._new_sessions(), set())
+
+    def test_session_written_when_stateful(self):
+        self.set_stateless(False)
+        self.assertTrue(self._new_sessions(1))
+
+    def test_invalid_token(self):
+        self.set_stateless(True)
+        result = self.json_call('/api/test/jwt_provider/me', 'invalid')
+        self.assertEqual(result['code'], 401)
@@ -1,7 +1,9 @@
 import os
-import jwt
 import re
-from dateutil.parser import parse
+import hashlib
+
+# heavy dependencies (jwt, simplejson, dateutil, gzip, brotli) are imported on first use,
+# to keep module import and worker startup fast
 
 
 addons_path = os.path.join(os.path.dirname(os.path.abspath(__file__))).replace('jwt_provider2', '')
@@ -13,9 +15,18 @@ def is_valid_email(email):
 
 
 def to_date(pg_time_string):
+    from dateutil.parser import parse
     return parse(pg_time_string)
 
 
+def dumps(*k, **kw):
+    '''
+    `simplejson.dumps`, imported on first use
+    '''
+    from simplejson import dumps
+    return dumps(*k, **kw)
+
+
 def get_path(*paths):
     ''' Make a path
     '''
@@ -25,10 +36,28 @@ def key():
     return os.environ.get('ODOO_JWT_KEY') or ''
 
 
+def setting(name, default=None, cast=str):
+    '''
+    Read a module setting from environment variable `ODOO_JWT_<NAME>`.
+
+    Return `default` if the variable is not set or cannot be casted.
+    '''
+    value = os.environ.get('ODOO_JWT_' + name.upper())
+    if value is None or value == '':
+        return default
+    if cast is bool:
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return default
+
+
 def sign_token(payload):
     '''
     Generally sign a jwt token
     '''
+    import jwt
     token = jwt.encode(
         payload,
         key(),
@@ -46,4 +75,36 @@ def decode_token(token):
 
     '''
     # decode token, will raise exceptions
+    import jwt
     return jwt.decode(token, key())
+
+
+def etag(body):
+    '''
+    Weak ETag of a serialized response body
+    '''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return 'W/"%s"' % hashlib.sha1(body).hexdigest()
+
+
+def compress(body, accept_encodings):
+    '''
+    Compress a response body according to the client's `Accept-Encoding`.
+
+    `accept_encodings` is a werkzeug `Accept` object (`httprequest.accept_encodings`).
+
+    Return a tuple (body, encoding), encoding is None if body is left untouched.
+    '''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if accept_encodings.quality('br') > 0:
+        try:
+            import brotli
+            return brotli.compress(body), 'br'
+        except ImportError:
+            pass
+    if accept_encodings.quality('gzip') > 0:
+        import gzip
+        return gzip.compress(body, compresslevel=6), 'gzip'
+    return body, None